@@ -1,15 +1,49 @@
+"""
+Renames photo files and builds Bootstrap 3 news carousels from them.
+
+Example usage (no argparse; adjust as needed), from the repo root:
+
+    from carosels.parsers.parser import parse_photos_to_carousel_html
+    parse_photos_to_carousel_html(r"photos\\news\\2026\\website_story")
+
+Tests live in test_parser.py next to this module:
+
+    python -m unittest carosels.parsers.test_parser
+"""
+
+import functools
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Union
-import unittest
-import tempfile
+from typing import Iterable, Optional, Union
 
 
 # ----------------------------
 # Filename normalization
 # ----------------------------
 
+class _KeepOnly(dict):
+    """
+    str.translate table that keeps the ASCII characters in `keep` and
+    deletes everything else. Non-ASCII code points miss the table and are
+    deleted by __missing__, so one translate call does the whole filter.
+    """
+
+    def __init__(self, keep: str):
+        super().__init__({c: (c if chr(c) in keep else None) for c in range(128)})
+
+    def __missing__(self, key: int) -> None:
+        return None
+
+
+_ALNUM = "abcdefghijklmnopqrstuvwxyz0123456789"
+_FILENAME_TABLE = _KeepOnly(_ALNUM + "_")
+_SLUG_TABLE = _KeepOnly(_ALNUM + "_-")
+_SUFFIX_TABLE = _KeepOnly(_ALNUM + ".")
+_RE_MULTI_UNDERSCORE = re.compile(r"_+")
+
+
 def sanitize_filename(name: str) -> str:
     """
     Lowercase, spaces->_, and keep only [a-z0-9_.-] in the final filename.
@@ -18,37 +52,66 @@ def sanitize_filename(name: str) -> str:
     p = Path(name)
 
     stem = p.stem.lower().replace(" ", "_")
-    stem = re.sub(r"[^a-z0-9_]", "", stem)
-    stem = re.sub(r"_+", "_", stem).strip("_")
+    stem = stem.translate(_FILENAME_TABLE)
+    stem = _RE_MULTI_UNDERSCORE.sub("_", stem).strip("_")
     if not stem:
         stem = "file"
 
     suffix = p.suffix.lower()
-    suffix = re.sub(r"[^a-z0-9.]", "", suffix)
+    suffix = suffix.translate(_SUFFIX_TABLE)
 
     return f"{stem}{suffix}"
 
 
+def _resolve_collision(name: str, existing: set[str]) -> str:
+    """
+    Returns `name`, or `<stem>_<n><suffix>` with the smallest n not in `existing`.
+    The chosen name is added to `existing`.
+    """
+    candidate = name
+    if candidate in existing:
+        stem, suffix = os.path.splitext(name)
+        i = 1
+        while candidate in existing:
+            candidate = f"{stem}_{i}{suffix}"
+            i += 1
+
+    existing.add(candidate)
+    return candidate
+
+
 def rename_files(folder: Union[str, Path]) -> None:
     """
     Renames files in folder (non-recursive) using sanitize_filename, collision-safe.
     """
-    folder_path = Path(folder)
-    if not folder_path.is_dir():
-        raise ValueError(f"Not a directory: {folder_path}")
-
-    for path in folder_path.iterdir():
-        if not path.is_file():
+    # Plain string paths throughout; no Path objects per entry.
+    folder_str = os.fspath(folder)
+    if not os.path.isdir(folder_str):
+        raise ValueError(f"Not a directory: {folder_str}")
+
+    # Materialize the scan before renaming so entries aren't seen twice.
+    # Collisions are checked against this in-memory set, not the filesystem.
+    # Names are keyed lowercase (sanitized names always are) so the check
+    # also holds on case-insensitive filesystems (Windows, macOS).
+    with os.scandir(folder_str) as it:
+        entries = list(it)
+    if not entries:
+        return
+    existing = {entry.name.lower() for entry in entries}
+
+    for entry in entries:
+        if not entry.is_file():
             continue
 
-        sanitized = sanitize_filename(path.name)
-        target = path.with_name(sanitized)
-
-        if path == target:
+        sanitized = sanitize_filename(entry.name)
+        # Already clean: skip before building any paths.
+        if sanitized == entry.name:
             continue
 
-        path.rename(target)
-        print(f"{path.name} -> {target.name}")
+        existing.discard(entry.name.lower())
+        new_name = _resolve_collision(sanitized, existing)
+        os.rename(entry.path, folder_str + os.sep + new_name)
+        print(f"{entry.name} -> {new_name}")
 
 
 # ----------------------------
@@ -61,43 +124,30 @@ def sanitize_slug(s: str) -> str:
     Keeps it simple: lowercase, spaces->_, only [a-z0-9_-].
     """
     s = s.lower().replace(" ", "_")
-    s = re.sub(r"[^a-z0-9_-]", "", s)
-    s = re.sub(r"_+", "_", s).strip("_")
+    s = s.translate(_SLUG_TABLE)
+    s = _RE_MULTI_UNDERSCORE.sub("_", s).strip("_")
     return s or "carousel"
 
 
-def build_carousel_html(
-    image_urls: list[str],
-    title: str,
-    interval_ms: int = 4000
-) -> str:
-    """
-    Returns a complete Bootstrap 3 HTML document embedding indicators+slides.
-    """
-    # Indicators
-    indicators_lines = []
-    for i in range(len(image_urls)):
-        cls = ' class="active"' if i == 0 else ""
-        indicators_lines.append(f'                <li data-target="#myCarousel" data-slide-to="{i}"{cls}></li>')
-
-    indicators = "\n".join(indicators_lines)
-
-    # Slides
-    slide_lines = []
-    for i, url in enumerate(image_urls):
-        active = " active" if i == 0 else ""
-        alt = os.path.basename(url)
-        slide_lines.append(
-            f'                <div class="item{active}"><img src="{url}" alt="{alt}" style="width:100%;"></div>'
-        )
+# Fixed fragments of the indicator and slide lines; only the index,
+# active marker, URL and alt text vary per line.
+_INDICATOR_PRE = '                <li data-target="#myCarousel" data-slide-to="'
+_INDICATOR_ACTIVE = ' class="active"'
+_INDICATOR_SUF = "></li>"
+_SLIDE_PRE = '                <div class="item'
+_SLIDE_ACTIVE = " active"
+_SLIDE_MID = '"><img src="'
+_SLIDE_MID2 = '" alt="'
+_SLIDE_SUF = '" style="width:100%;"></div>'
 
-    slides = "\n".join(slide_lines)
 
-    # Full HTML (Bootstrap 3)
-    html = f"""<!DOCTYPE html>
+# Bootstrap 3 carousel skeleton. Indicator lines go between HEAD and
+# MIDDLE, slide lines between MIDDLE and FOOT. HEAD takes (title,
+# interval_ms) and FOOT takes (interval_ms,) via %-formatting.
+_CAROUSEL_HEAD = """<!DOCTYPE html>
 <html lang="en">
 <head>
-    <title>{title}</title>
+    <title>%s</title>
     <meta charset="utf-8">
     <meta name="viewport" content="width=device-width, height=device-height, initial-scale=1">
     <link rel="stylesheet" href="https://maxcdn.bootstrapcdn.com/bootstrap/3.4.1/css/bootstrap.min.css">
@@ -106,13 +156,15 @@ def build_carousel_html(
 </head>
 <body>
     <div class="container">
-        <div id="myCarousel" class="carousel slide" data-ride="carousel" data-interval="{interval_ms}">
+        <div id="myCarousel" class="carousel slide" data-ride="carousel" data-interval="%s">
             <ol class="carousel-indicators">
-{indicators}
+"""
+_CAROUSEL_MIDDLE = """
             </ol>
 
             <div class="carousel-inner" role="listbox">
-{slides}
+"""
+_CAROUSEL_FOOT = """
             </div>
 
             <a class="left carousel-control" href="#myCarousel" data-slide="prev">
@@ -128,28 +180,159 @@ def build_carousel_html(
 
     <script>
     // JS fallback to ensure interval applies even if data-interval is ignored.
-    $(function() {{
-        $('#myCarousel').carousel({{ interval: {interval_ms} }});
-    }});
+    $(function() {
+        $('#myCarousel').carousel({ interval: %s });
+    });
     </script>
 </body>
 </html>
 """
-    return html
+
+
+def _carousel_html_parts(
+    image_urls: list[str],
+    alt_texts: list[str],
+    title: str,
+    interval_ms: int,
+    url_prefix: str = ""
+) -> list[str]:
+    """
+    Returns the carousel document as consecutive string parts.
+    Joining them gives the full HTML; the write path encodes and writes
+    them in order without joining first.
+    Each slide's src is `url_prefix` + the matching entry of `image_urls`.
+    """
+    # Lines are assigned by index into pre-sized lists, then joined once.
+    count = len(image_urls)
+
+    # Indicators
+    indicators_lines = [""] * count
+    for i in range(count):
+        cls = _INDICATOR_ACTIVE if i == 0 else ""
+        indicators_lines[i] = "".join((_INDICATOR_PRE, str(i), '"', cls, _INDICATOR_SUF))
+
+    indicators = "\n".join(indicators_lines)
+
+    # Slides: url_prefix is baked into the fixed fragment once per call.
+    slide_mid = _SLIDE_MID + url_prefix
+    slide_lines = [""] * count
+    for i, (url, alt) in enumerate(zip(image_urls, alt_texts)):
+        active = _SLIDE_ACTIVE if i == 0 else ""
+        slide_lines[i] = "".join((_SLIDE_PRE, active, slide_mid, url, _SLIDE_MID2, alt, _SLIDE_SUF))
+
+    slides = "\n".join(slide_lines)
+
+    # Full HTML (Bootstrap 3): static skeleton around the two line blocks.
+    interval = str(interval_ms)
+    head = _CAROUSEL_HEAD % (title, interval)
+    foot = _CAROUSEL_FOOT % (interval,)
+    return [head, indicators, _CAROUSEL_MIDDLE, slides, foot]
+
+
+def build_carousel_html(
+    image_urls: list[str],
+    title: str,
+    interval_ms: int = 4000
+) -> str:
+    """
+    Returns a complete Bootstrap 3 HTML document embedding indicators+slides.
+    """
+    alt_texts = [os.path.basename(url) for url in image_urls]
+    return "".join(_carousel_html_parts(image_urls, alt_texts, title, interval_ms))
+
+
+# Defaults shared by the single-folder and batch entry points.
+_DEFAULT_REPO_PUBLIC_BASE_URL = "https://aicybercomputing-byte.github.io/public-htmls/"
+_DEFAULT_OUTPUT_CAROSELS_DIR = Path("carosels") / "news" / "2026"
+
+# Lowercase image extensions picked up for the carousel.
+_IMAGE_SUFFIXES = (".png", ".jpg")
+
+
+# Max buffers per writev call; larger gathers are submitted in several calls.
+# sysconf is missing on Windows and may report -1 (no limit known).
+try:
+    _IOV_MAX = os.sysconf("SC_IOV_MAX")
+except (AttributeError, ValueError, OSError):
+    _IOV_MAX = -1
+if _IOV_MAX <= 0:
+    _IOV_MAX = 1024
+
+
+def _write_chunks(path: Path, chunks: list[bytes]) -> None:
+    """
+    Overwrites `path` with `chunks` in order.
+    Uses a gathered os.writev where available (POSIX), else writelines.
+    """
+    if not hasattr(os, "writev"):
+        with open(path, "wb") as f:
+            f.writelines(chunks)
+        return
+
+    pending = [memoryview(chunk) for chunk in chunks if chunk]
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+    try:
+        while pending:
+            written = os.writev(fd, pending[:_IOV_MAX])
+            # writev may return short; drop what was written and retry the rest.
+            while written:
+                head = pending[0]
+                if written >= len(head):
+                    written -= len(head)
+                    del pending[0]
+                else:
+                    pending[0] = head[written:]
+                    written = 0
+    finally:
+        os.close(fd)
+
+
+def _check_inside_out_dir(out_dir: Path, out_path: Path, out_dir_resolved: Optional[str]) -> None:
+    """
+    Security: raises RuntimeError unless `out_path` resolves inside `out_dir`.
+    `out_dir_resolved` is out_dir's resolved path if already known, else None.
+    """
+    if out_dir_resolved is None:
+        out_dir_resolved = str(out_dir.resolve())
+    out_path_resolved = str(out_path.resolve())
+    try:
+        inside = os.path.commonpath([out_dir_resolved, out_path_resolved]) == out_dir_resolved
+    except ValueError:
+        # Windows: paths on different drives have no common path.
+        inside = False
+    if not inside:
+        raise RuntimeError("Refusing to write outside output directory.")
 
 
 def parse_photos_to_carousel_html(
     photos_folder: Union[str, Path],
-    repo_public_base_url: str = "https://aicybercomputing-byte.github.io/public-htmls/",
-    output_carosels_dir: Union[str, Path] = Path("carosels") / "news" / "2026",
+    repo_public_base_url: str = _DEFAULT_REPO_PUBLIC_BASE_URL,
+    output_carosels_dir: Union[str, Path] = _DEFAULT_OUTPUT_CAROSELS_DIR,
     interval_ms: int = 4000
-) -> Path:
+) -> Optional[Path]:
     """
     - Renames photo files in `photos_folder`
-    - Collects .png files
+    - Collects .png/.jpg files
     - Builds a complete Bootstrap 3 carousel HTML
     - Overwrites `output_carosels_dir/<last_folder_name>.html`
-    - Returns the output HTML Path
+    - Returns the output HTML Path, or None if there are no images; in that
+      case any existing output from an earlier run is deleted
+    """
+    return _parse_photos_to_carousel_html(
+        photos_folder, repo_public_base_url, Path(output_carosels_dir), interval_ms, out_dir_resolved=None
+    )
+
+
+def _parse_photos_to_carousel_html(
+    photos_folder: Union[str, Path],
+    repo_public_base_url: str,
+    out_dir: Path,
+    interval_ms: int,
+    out_dir_resolved: Optional[str]
+) -> Optional[Path]:
+    """
+    Body of parse_photos_to_carousel_html. `out_dir_resolved` is out_dir's
+    resolved path when the caller already has it (batch runs), else None.
     """
     photos_folder = Path(photos_folder)
     if not photos_folder.is_dir():
@@ -157,99 +340,98 @@ def parse_photos_to_carousel_html(
 
     rename_files(photos_folder)
 
-    pngs = sorted(
-        [p for p in photos_folder.iterdir() if p.is_file() and (p.suffix.lower() == ".png" or p.suffix.lower() == ".jpg")],
-        key=lambda p: p.name
-    )
+    # rename_files has already lowercased every file name.
+    with os.scandir(photos_folder) as it:
+        names = [
+            entry.name for entry in it
+            if entry.is_file() and entry.name.endswith(_IMAGE_SUFFIXES)
+        ]
+    # Output filename based on last folder name
+    slug = sanitize_slug(photos_folder.name)
+    out_path = out_dir / f"{slug}.html"
+
+    if not names:
+        # Remove a carousel left by an earlier run so the published page
+        # doesn't keep linking to deleted images.
+        if os.path.lexists(out_path):
+            _check_inside_out_dir(out_dir, out_path, out_dir_resolved)
+            out_path.unlink()
+        return None
+    # Names are plain strings, so an in-place sort needs no key function.
+    names.sort()
 
     # Convert to URL paths.
     # We want: repo_public_base_url + "photos/news/2026/website_story/file.png"
     # So we need the path relative to the repo root that contains "public-htmls".
     # In your usage, `photos_folder` is likely already like "photos/news/2026/website_story".
-    # We'll use as_posix from that folder down.
-    rel_paths = [p.as_posix() for p in pngs]
-    image_urls = [repo_public_base_url.rstrip("/") + "/" + rel for rel in rel_paths]
+    # We'll use as_posix from that folder down, computed once for the folder.
+    folder_posix = photos_folder.as_posix()
+    if folder_posix == ".":
+        folder_posix = ""
+    elif not folder_posix.endswith("/"):
+        folder_posix += "/"
+    url_prefix = repo_public_base_url.rstrip("/") + "/" + folder_posix
 
-    # Output filename based on last folder name
-    slug = sanitize_slug(photos_folder.name)
-    out_dir = Path(output_carosels_dir)
     out_dir.mkdir(parents=True, exist_ok=True)
-
-    out_path = out_dir / f"{slug}.html"
-
-    # Security: ensure we only write inside out_dir
-    out_dir_resolved = out_dir.resolve()
-    out_path_resolved = out_path.resolve()
-    if out_dir_resolved not in out_path_resolved.parents and out_path_resolved != out_dir_resolved:
-        raise RuntimeError("Refusing to write outside output directory.")
+    _check_inside_out_dir(out_dir, out_path, out_dir_resolved)
 
     title = slug.replace("_", " ").title()
-    html = build_carousel_html(image_urls=image_urls, title=title, interval_ms=interval_ms)
+    # The scanned file names are both the URL suffixes and the alt texts.
+    parts = _carousel_html_parts(names, names, title=title, interval_ms=interval_ms, url_prefix=url_prefix)
 
-    out_path.write_text(html, encoding="utf-8")
+    _write_chunks(out_path, [part.encode("utf-8") for part in parts])
     return out_path
 
 
-# ----------------------------
-# Tests (functional + security)
-# ----------------------------
+def parse_photo_folders_to_carousel_html(
+    photos_folders: Iterable[Union[str, Path]],
+    repo_public_base_url: str = _DEFAULT_REPO_PUBLIC_BASE_URL,
+    output_carosels_dir: Union[str, Path] = _DEFAULT_OUTPUT_CAROSELS_DIR,
+    interval_ms: int = 4000,
+    max_workers: Optional[int] = None
+) -> list[Optional[Path]]:
+    """
+    Runs parse_photos_to_carousel_html over several folders on a thread pool.
+    The work is scandir/rename/write syscalls, which release the GIL, so
+    folders overlap their I/O. Returns output paths (None for folders
+    without images) in input order.
+
+    A folder listed more than once (same resolved path) is processed once.
+    Folders whose names map to the same output file are processed one
+    after another in input order, so the last one wins as in a plain loop.
+    """
+    if max_workers is None:
+        max_workers = (os.cpu_count() or 4) * 4
+
+    # Resolve the shared output dir once for the whole batch.
+    out_dir = Path(output_carosels_dir)
+    parse = functools.partial(
+        _parse_photos_to_carousel_html,
+        repo_public_base_url=repo_public_base_url,
+        out_dir=out_dir,
+        interval_ms=interval_ms,
+        out_dir_resolved=str(out_dir.resolve())
+    )
+
+    folders = [Path(folder) for folder in photos_folders]
+    keys = [str(folder.resolve()) for folder in folders]
+
+    # Group unique folders by output slug; groups run concurrently, each
+    # group's folders run sequentially.
+    groups: dict[str, list[tuple[str, Path]]] = {}
+    seen: set[str] = set()
+    for key, folder in zip(keys, folders):
+        if key in seen:
+            continue
+        seen.add(key)
+        groups.setdefault(sanitize_slug(folder.name), []).append((key, folder))
+
+    def run_group(group: list[tuple[str, Path]]) -> list[tuple[str, Optional[Path]]]:
+        return [(key, parse(folder)) for key, folder in group]
+
+    results: dict[str, Optional[Path]] = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as ex:
+        for group_results in ex.map(run_group, groups.values()):
+            results.update(group_results)
 
-class TestCarouselHtml(unittest.TestCase):
-    def test_generates_valid_bootstrap3_structure(self):
-        with tempfile.TemporaryDirectory() as td:
-            root = Path(td)
-            photos = root / "photos" / "news" / "2026" / "website_story"
-            photos.mkdir(parents=True, exist_ok=True)
-
-            # minimal fake png headers
-            (photos / "A.png").write_bytes(b"\x89PNG\r\n\x1a\n")
-            (photos / "B.png").write_bytes(b"\x89PNG\r\n\x1a\n")
-
-            out_dir = root / "carosels" / "news" / "2026"
-            out_path = parse_photos_to_carousel_html(
-                photos_folder=photos,
-                repo_public_base_url="https://example.test/public-htmls/",
-                output_carosels_dir=out_dir,
-                interval_ms=1234
-            )
-
-            html = out_path.read_text(encoding="utf-8")
-
-            # Required Bootstrap 3 pieces
-            self.assertIn('class="carousel-inner"', html)
-            self.assertIn('class="item active"', html)     # exactly one active slide
-            self.assertEqual(html.count('class="item active"'), 1)
-            self.assertEqual(html.count('class="item'), 2)  # total slides
-
-            # Indicators count matches slides
-            self.assertEqual(html.count('data-slide-to="'), 2)
-            self.assertIn('data-slide-to="0" class="active"', html)
-
-            # Auto-rotate included
-            self.assertIn('data-interval="1234"', html)
-            self.assertIn("interval: 1234", html)
-
-    def test_security_output_stays_inside_output_dir(self):
-        with tempfile.TemporaryDirectory() as td:
-            root = Path(td)
-            photos = root / "photos" / "news" / "2026" / "weird..name///"
-            # Pathlib will normalize; create folder with a safe name anyway
-            photos = root / "photos" / "news" / "2026" / "weird__name"
-            photos.mkdir(parents=True, exist_ok=True)
-            (photos / "x.png").write_bytes(b"\x89PNG\r\n\x1a\n")
-
-            out_dir = root / "carosels" / "news" / "2026"
-            out_path = parse_photos_to_carousel_html(
-                photos_folder=photos,
-                repo_public_base_url="https://example.test/public-htmls/",
-                output_carosels_dir=out_dir
-            )
-
-            # Ensure file is inside out_dir
-            self.assertTrue(out_path.resolve().is_relative_to(out_dir.resolve()))
-
-
-if __name__ == "__main__":
-    # Example usage (no argparse; adjust as needed):
-    # parse_photos_to_carousel_html(r"photos\news\2026\website_story")
-    unittest.main()
+    return [results[key] for key in keys]
@@ -0,0 +1,305 @@
+"""
+Tests for carosels/parsers/parser.py (functional + security).
+
+Run from the repo root with either:
+
+    python -m unittest carosels.parsers.test_parser
+    python carosels/parsers/test_parser.py
+"""
+
+import contextlib
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+if __package__ in (None, ""):
+    # Run as a script: make the repo root importable for `carosels`.
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from carosels.parsers import parser
+from carosels.parsers.parser import (
+    build_carousel_html,
+    parse_photo_folders_to_carousel_html,
+    parse_photos_to_carousel_html,
+    rename_files,
+    sanitize_filename,
+    sanitize_slug,
+)
+
+
+# ----------------------------
+# Tests (functional + security)
+# ----------------------------
+
+class TestSanitize(unittest.TestCase):
+    def test_sanitize_filename(self):
+        self.assertEqual(sanitize_filename("My Photo (1).PNG"), "my_photo_1.png")
+        self.assertEqual(sanitize_filename("caf\u00e9__menu-2.JPG"), "caf_menu2.jpg")
+        self.assertEqual(sanitize_filename("###.png"), "file.png")
+
+    def test_sanitize_slug(self):
+        self.assertEqual(sanitize_slug("Website Story-2026"), "website_story-2026")
+        self.assertEqual(sanitize_slug("\u00fc!!"), "carousel")
+
+
+class TestRenameFiles(unittest.TestCase):
+    def test_collisions_do_not_overwrite(self):
+        with tempfile.TemporaryDirectory() as td:
+            folder = Path(td)
+            (folder / "a_b.png").write_bytes(b"first")
+            (folder / "A B.png").write_bytes(b"second")
+
+            rename_files(folder)
+
+            names = sorted(p.name for p in folder.iterdir())
+            self.assertEqual(names, ["a_b.png", "a_b_1.png"])
+            self.assertEqual((folder / "a_b.png").read_bytes(), b"first")
+            self.assertEqual((folder / "a_b_1.png").read_bytes(), b"second")
+
+    def test_collisions_differing_only_in_case(self):
+        with tempfile.TemporaryDirectory() as td:
+            folder = Path(td)
+            (folder / "A_B.png").write_bytes(b"upper")
+            (folder / "a b.png").write_bytes(b"spaced")
+            real_rename = os.rename
+            real_scandir = os.scandir
+
+            @contextlib.contextmanager
+            def spaced_name_first_scandir(path):
+                # "a b.png" sorts after "A_B.png"; visiting it first is the order
+                # that used to clobber A_B.png.
+                with real_scandir(path) as it:
+                    yield iter(sorted(it, key=lambda entry: entry.name, reverse=True))
+
+            def case_insensitive_rename(src, dst):
+                # Behave like Windows: refuse a target that exists under another case.
+                src_name, dst_name = os.path.basename(src), os.path.basename(dst)
+                taken = {p.name.lower() for p in folder.iterdir()} - {src_name.lower()}
+                if dst_name.lower() in taken:
+                    raise FileExistsError(dst)
+                real_rename(src, dst)
+
+            with mock.patch("os.scandir", side_effect=spaced_name_first_scandir), \
+                    mock.patch("os.rename", side_effect=case_insensitive_rename):
+                rename_files(folder)
+
+            contents = sorted(p.read_bytes() for p in folder.iterdir())
+            self.assertEqual(sorted(p.name for p in folder.iterdir()), ["a_b.png", "a_b_1.png"])
+            self.assertEqual(contents, [b"spaced", b"upper"])
+
+
+@unittest.skipUnless(hasattr(os, "writev"), "os.writev is POSIX-only")
+class TestWriteChunks(unittest.TestCase):
+    def test_more_chunks_than_iov_max_with_short_writes(self):
+        chunks = [b"%d," % i for i in range(parser._IOV_MAX * 2 + 3)] + [b"", b"end"]
+        real_writev = os.writev
+        batch_sizes = []
+
+        def short_writev(fd, buffers):
+            # Accept at most half of what was offered, forcing the retry loop
+            # to trim partially written chunks.
+            batch_sizes.append(len(buffers))
+            data = b"".join(buffers)
+            return real_writev(fd, [data[: max(1, len(data) // 2)]])
+
+        with tempfile.TemporaryDirectory() as td:
+            path = Path(td) / "out.html"
+            path.write_bytes(b"stale content that must be truncated" * 100)
+
+            with mock.patch("os.writev", side_effect=short_writev):
+                parser._write_chunks(path, chunks)
+
+            self.assertEqual(path.read_bytes(), b"".join(chunks))
+            self.assertLessEqual(max(batch_sizes), parser._IOV_MAX)
+            self.assertGreater(len(batch_sizes), 2)
+
+
+class TestCarouselHtml(unittest.TestCase):
+    def test_build_carousel_html(self):
+        html = build_carousel_html(
+            ["https://example.test/p/a.png", "https://example.test/p/b%20c.png"],
+            title="Story {1} 100%",
+            interval_ms=2500
+        )
+
+        self.assertTrue(html.startswith("<!DOCTYPE html>\n"))
+        self.assertIn("<title>Story {1} 100%</title>", html)
+        self.assertIn(
+            '                <li data-target="#myCarousel" data-slide-to="0" class="active"></li>\n'
+            '                <li data-target="#myCarousel" data-slide-to="1"></li>\n',
+            html
+        )
+        self.assertIn(
+            '                <div class="item active"><img src="https://example.test/p/a.png" alt="a.png"'
+            ' style="width:100%;"></div>\n'
+            '                <div class="item"><img src="https://example.test/p/b%20c.png" alt="b%20c.png"'
+            ' style="width:100%;"></div>\n',
+            html
+        )
+        self.assertIn('data-interval="2500"', html)
+        self.assertIn("$('#myCarousel').carousel({ interval: 2500 });", html)
+        self.assertTrue(html.endswith("</html>\n"))
+
+    def test_generates_valid_bootstrap3_structure(self):
+        with tempfile.TemporaryDirectory() as td:
+            root = Path(td)
+            photos = root / "photos" / "news" / "2026" / "website_story"
+            photos.mkdir(parents=True, exist_ok=True)
+
+            # minimal fake png headers
+            (photos / "A.png").write_bytes(b"\x89PNG\r\n\x1a\n")
+            (photos / "B.png").write_bytes(b"\x89PNG\r\n\x1a\n")
+
+            out_dir = root / "carosels" / "news" / "2026"
+            out_path = parse_photos_to_carousel_html(
+                photos_folder=photos,
+                repo_public_base_url="https://example.test/public-htmls/",
+                output_carosels_dir=out_dir,
+                interval_ms=1234
+            )
+
+            html = out_path.read_text(encoding="utf-8")
+
+            # Required Bootstrap 3 pieces
+            self.assertIn('class="carousel-inner"', html)
+            self.assertIn('class="item active"', html)     # exactly one active slide
+            self.assertEqual(html.count('class="item active"'), 1)
+            self.assertEqual(html.count('class="item'), 2)  # total slides
+
+            # Indicators count matches slides
+            self.assertEqual(html.count('data-slide-to="'), 2)
+            self.assertIn('data-slide-to="0" class="active"', html)
+
+            # Auto-rotate included
+            self.assertIn('data-interval="1234"', html)
+            self.assertIn("interval: 1234", html)
+
+    def test_parses_several_folders(self):
+        with tempfile.TemporaryDirectory() as td:
+            root = Path(td)
+            folders = []
+            for name in ("story_one", "story_two"):
+                photos = root / "photos" / name
+                photos.mkdir(parents=True)
+                (photos / "a.png").write_bytes(b"\x89PNG\r\n\x1a\n")
+                folders.append(photos)
+
+            out_dir = root / "carosels"
+            out_paths = parse_photo_folders_to_carousel_html(
+                folders,
+                repo_public_base_url="https://example.test/public-htmls/",
+                output_carosels_dir=out_dir,
+                max_workers=2
+            )
+
+            self.assertEqual([p.name for p in out_paths], ["story_one.html", "story_two.html"])
+            for out_path in out_paths:
+                self.assertEqual(out_path.read_text(encoding="utf-8").count('class="item'), 1)
+
+    def test_duplicate_folder_is_processed_once(self):
+        with tempfile.TemporaryDirectory() as td:
+            root = Path(td)
+            photos = root / "photos" / "story"
+            photos.mkdir(parents=True)
+            for n in range(300):
+                (photos / f"IMG {n}.png").write_bytes(b"\x89PNG\r\n\x1a\n")
+
+            out_dir = root / "carosels"
+            out_paths = parse_photo_folders_to_carousel_html(
+                [photos, root / "photos" / ".." / "photos" / "story"],
+                repo_public_base_url="https://example.test/public-htmls/",
+                output_carosels_dir=out_dir,
+                max_workers=2
+            )
+
+            self.assertEqual(out_paths, [out_dir / "story.html"] * 2)
+            self.assertEqual(len(list(photos.iterdir())), 300)
+            self.assertEqual(out_paths[0].read_text(encoding="utf-8").count('class="item'), 300)
+
+    def test_folders_sharing_a_slug_run_in_order(self):
+        with tempfile.TemporaryDirectory() as td:
+            root = Path(td)
+            first = root / "x" / "story"
+            second = root / "y" / "Story"
+            for folder, image in ((first, "first.png"), (second, "second.png")):
+                folder.mkdir(parents=True)
+                (folder / image).write_bytes(b"\x89PNG\r\n\x1a\n")
+
+            out_dir = root / "carosels"
+            out_paths = parse_photo_folders_to_carousel_html(
+                [first, second],
+                repo_public_base_url="https://example.test/public-htmls/",
+                output_carosels_dir=out_dir,
+                max_workers=2
+            )
+
+            self.assertEqual(out_paths, [out_dir / "story.html"] * 2)
+            html = out_paths[1].read_text(encoding="utf-8")
+            self.assertIn("second.png", html)
+            self.assertNotIn("first.png", html)
+
+    def test_folder_without_images_writes_nothing(self):
+        with tempfile.TemporaryDirectory() as td:
+            root = Path(td)
+            photos = root / "photos" / "empty_story"
+            photos.mkdir(parents=True)
+            (photos / "notes.txt").write_text("no images here", encoding="utf-8")
+
+            out_dir = root / "carosels"
+            out_path = parse_photos_to_carousel_html(photos, output_carosels_dir=out_dir)
+
+            self.assertIsNone(out_path)
+            self.assertFalse(out_dir.exists())
+
+    def test_folder_emptied_since_last_run_removes_old_output(self):
+        with tempfile.TemporaryDirectory() as td:
+            root = Path(td)
+            photos = root / "photos" / "story"
+            photos.mkdir(parents=True)
+            (photos / "a.png").write_bytes(b"\x89PNG\r\n\x1a\n")
+
+            out_dir = root / "carosels"
+            out_path = parse_photos_to_carousel_html(photos, output_carosels_dir=out_dir)
+            self.assertIn("a.png", out_path.read_text(encoding="utf-8"))
+
+            (photos / "a.png").unlink()
+            self.assertIsNone(parse_photos_to_carousel_html(photos, output_carosels_dir=out_dir))
+            self.assertFalse(out_path.exists())
+
+    def test_security_output_stays_inside_output_dir(self):
+        with tempfile.TemporaryDirectory() as td:
+            root = Path(td)
+            photos = root / "photos" / "news" / "2026" / "weird..name///"
+            # Pathlib will normalize; create folder with a safe name anyway
+            photos = root / "photos" / "news" / "2026" / "weird__name"
+            photos.mkdir(parents=True, exist_ok=True)
+            (photos / "x.png").write_bytes(b"\x89PNG\r\n\x1a\n")
+
+            out_dir = root / "carosels" / "news" / "2026"
+            out_path = parse_photos_to_carousel_html(
+                photos_folder=photos,
+                repo_public_base_url="https://example.test/public-htmls/",
+                output_carosels_dir=out_dir
+            )
+
+            # Ensure file is inside out_dir
+            self.assertTrue(out_path.resolve().is_relative_to(out_dir.resolve()))
+
+    def test_security_different_drive_is_refused(self):
+        with tempfile.TemporaryDirectory() as td:
+            root = Path(td)
+            photos = root / "photos" / "story"
+            photos.mkdir(parents=True)
+            (photos / "x.png").write_bytes(b"\x89PNG\r\n\x1a\n")
+
+            # os.path.commonpath raises ValueError for paths on different Windows drives.
+            with mock.patch("os.path.commonpath", side_effect=ValueError("different drives")):
+                with self.assertRaises(RuntimeError):
+                    parse_photos_to_carousel_html(photos, output_carosels_dir=root / "carosels")
+
+
+if __name__ == "__main__":
+    unittest.main()